@@ -5,14 +5,26 @@ Automates the process of setting up Xbox Cloud Gaming through Microsoft Edge.
 """
 import os
 import sys
+import functools
 import subprocess
 import shutil
 import re
-import hashlib
+import contextlib
+import mmap
+import zlib
 import time
+import signal
+import threading
+import concurrent.futures
+import http.client
 import urllib.request
-import urllib.error
-from urllib.parse import urlparse
+from urllib.parse import urljoin, urlparse
+
+try:
+    import fcntl
+except ImportError:
+    # Not available on Windows, artwork is copied normally there
+    fcntl = None
 
 # Artwork URLs
 ARTWORK = {
@@ -30,9 +42,76 @@ if not os.path.exists(STEAM_DIR):
 USERDATA_DIR = os.path.join(STEAM_DIR, "userdata")
 ARTWORK_DIR = os.path.join(HOME_DIR, "Documents", "xbox_cloud_gaming_artwork")
 
+# Microsoft Edge shortcut details
+EDGE_EXE = "/usr/bin/flatpak"
+EDGE_LAUNCH_ARGS = "run com.microsoft.Edge"
+EDGE_NAME = "Microsoft Edge"
+
+# Fields of Edge's shortcuts.vdf entry that follow its appid, in Valve's format
+_EDGE_SHORTCUT_FIELDS = b"".join(
+    [
+        b"\x01AppName\x00",
+        EDGE_NAME.encode(),
+        b"\x00",
+        b'\x01Exe\x00"',
+        EDGE_EXE.encode(),
+        b'"\x00',
+        b'\x01StartDir\x00"',
+        os.path.dirname(EDGE_EXE).encode(),
+        b'"\x00',
+        b"\x01icon\x00\x00",
+        b"\x01ShortcutPath\x00\x00",
+        b"\x01LaunchOptions\x00",
+        EDGE_LAUNCH_ARGS.encode(),
+        b"\x00",
+        b"\x02IsHidden\x00\x00\x00\x00\x00",
+        b"\x02AllowDesktopConfig\x00\x01\x00\x00\x00",
+        b"\x02AllowOverlay\x00\x01\x00\x00\x00",
+        b"\x02OpenVR\x00\x00\x00\x00\x00",
+        b"\x02Devkit\x00\x00\x00\x00\x00",
+        b"\x01DevkitGameID\x00\x00",
+        b"\x01DevkitOverrideAppID\x00\x00",
+        b"\x02LastPlayTime\x00\x00\x00\x00\x00",
+        b"\x01FlatpakAppID\x00com.microsoft.Edge\x00",
+        b"\x00tags\x00",
+        b"\x08\x08",
+    ]
+)
+
+# Send a browser user agent with downloads to avoid potential blocks
+HTTP_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
+}
+
+# ioctl request that clones a file's extents copy-on-write (FICLONE, linux/fs.h)
+FICLONE = 0x40049409
+
+# Buffer size for streaming downloads to disk
+DOWNLOAD_CHUNK_SIZE = 1 << 20
+
+# Redirect statuses followed by http_request, and how many hops to allow
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# Whether Steam may be running while VDF files are read, decided once by main.
+# Until then map_file assumes it is and doesn't map the files.
+_STEAM_RUNNING = True
+
+# Idle keep-alive connections, keyed by (scheme, host), shared by all downloads
+_HTTP_POOL = {}
+_HTTP_POOL_LOCK = threading.Lock()
+
 # Xbox Cloud Gaming launch options
 LAUNCH_OPTIONS = '--window-size=1024,640 --force-device-scale-factor=1.25 --device-scale-factor=1.25 --kiosk "https://www.xbox.com/play"'
 
+# shortcuts.vdf fields: SOH + key + NUL + value + NUL
+_APP_NAME_RE = re.compile(rb"\x01AppName\x00(Microsoft Edge|Edge)\x00")
+_LAUNCH_RE = re.compile(rb"\x01LaunchOptions\x00([^\x00]*)\x00")
+
+# localconfig.vdf fields: "key" "value", with quotes in values escaped as \"
+_LAUNCH_RE_TXT = re.compile(r'"LaunchOptions"\s*"((?:[^"\\]|\\.)*)"')
+_LAUNCH_OPTIONS_TXT = LAUNCH_OPTIONS.replace("\\", "\\\\").replace('"', '\\"')
+
 
 def log(message):
     """Print a message with timestamp"""
@@ -68,84 +147,492 @@ def run_command(cmd, check=True, debug=False):
         return None
 
 
+def get_connection(pool_key):
+    """Take an idle connection to a (scheme, host) from the pool, or open a new one
+
+    Returns (connection, reused), where reused is True for a pooled connection.
+    """
+    with _HTTP_POOL_LOCK:
+        idle = _HTTP_POOL.get(pool_key)
+        if idle:
+            return idle.pop(), True
+
+    scheme, host = pool_key
+    if scheme == "https":
+        return http.client.HTTPSConnection(host, timeout=30), False
+    return http.client.HTTPConnection(host, timeout=30), False
+
+
+def release_connection(pool_key, conn):
+    """Return a connection to the pool so the next request can reuse it"""
+    # Requests sent through urlopen have no pooled connection
+    if conn is None:
+        return
+    with _HTTP_POOL_LOCK:
+        _HTTP_POOL.setdefault(pool_key, []).append(conn)
+
+
+def close_connections():
+    """Close and forget every idle pooled connection"""
+    with _HTTP_POOL_LOCK:
+        pooled = list(_HTTP_POOL.values())
+        _HTTP_POOL.clear()
+
+    for idle in pooled:
+        for conn in idle:
+            conn.close()
+
+
+def uses_proxy(scheme, host):
+    """Check whether the http(s)_proxy environment applies to a host"""
+    if scheme not in urllib.request.getproxies():
+        return False
+    return not urllib.request.proxy_bypass(host)
+
+
+def send_request(method, parsed):
+    """Send one request over a pooled connection and return (connection, response)"""
+    path = parsed.path or "/"
+    if parsed.query:
+        path += f"?{parsed.query}"
+
+    pool_key = (parsed.scheme, parsed.netloc)
+    conn, reused = get_connection(pool_key)
+    try:
+        conn.request(method, path, headers=HTTP_HEADERS)
+        return conn, conn.getresponse()
+    except (http.client.HTTPException, OSError):
+        conn.close()
+        # Only a pooled connection may have been dropped by the server while idle,
+        # failures on a fresh one (timeouts, refused connects) are not retried
+        if not reused:
+            raise
+
+    conn, _ = get_connection(pool_key)
+    conn.request(method, path, headers=HTTP_HEADERS)
+    return conn, conn.getresponse()
+
+
+def http_request(method, url):
+    """Send a request, following redirects, and return (pool_key, connection, response)
+
+    Requests go over pooled keep-alive connections. When a proxy is configured
+    they go through urlopen instead, which returns None as the connection.
+    The response must be read to the end before the connection is released.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parsed = urlparse(url)
+        pool_key = (parsed.scheme, parsed.netloc)
+
+        if uses_proxy(parsed.scheme, parsed.hostname):
+            request = urllib.request.Request(url, headers=HTTP_HEADERS, method=method)
+            return pool_key, None, urllib.request.urlopen(request, timeout=30)
+
+        conn, response = send_request(method, parsed)
+        location = response.getheader("Location")
+        if response.status not in REDIRECT_STATUSES or not location:
+            return pool_key, conn, response
+
+        # Drain the redirect so its connection can be reused for the next hop
+        response.read()
+        release_connection(pool_key, conn)
+        url = urljoin(url, location)
+
+    raise http.client.HTTPException(f"Too many redirects, last location: {url}")
+
+
+def find_steam_pids():
+    """Find the current user's running Steam client processes by reading /proc
+
+    Matches the exact process name steam, as killall does, so helpers such as
+    steamwebhelper and the steam.sh wrapper are not included.
+    """
+    pids = []
+    uid = os.getuid()
+    try:
+        with os.scandir("/proc") as entries:
+            for entry in entries:
+                if not entry.name.isdigit():
+                    continue
+                try:
+                    # Another user's Steam doesn't use our files or take our signals
+                    if entry.stat().st_uid != uid:
+                        continue
+                    with open(f"/proc/{entry.name}/comm") as f:
+                        if f.read().strip() == "steam":
+                            pids.append(int(entry.name))
+                except OSError:
+                    # The process exited while we were scanning
+                    continue
+    except OSError as e:
+        log(f"Could not check for running Steam processes: {e}")
+
+    return pids
+
+
+@functools.lru_cache(maxsize=None)
+def get_flatpak_apps(debug=False):
+    """List installed Flatpak apps, only queried once per run"""
+    return run_command(["flatpak", "list", "--app"], check=False, debug=debug)
+
+
+@functools.lru_cache(maxsize=None)
+def get_edge_flatpak_info(debug=False):
+    """Get Flatpak info for Microsoft Edge, only queried once per run"""
+    return run_command(
+        ["flatpak", "info", "com.microsoft.Edge"], check=False, debug=debug
+    )
+
+
+def is_download_current(url, destination):
+    """Check with a HEAD request whether an earlier download is still up to date
+
+    Compares the size with Content-Length and, when an ETag was saved next to
+    the file by download_file, the ETag as well.
+    """
+    try:
+        pool_key, conn, response = http_request("HEAD", url)
+        response.read()
+        release_connection(pool_key, conn)
+        if response.status != 200:
+            return False
+
+        verified = False
+        content_length = response.getheader("Content-Length")
+        if content_length is not None:
+            if int(content_length) != os.path.getsize(destination):
+                return False
+            verified = True
+
+        etag = response.getheader("ETag")
+        etag_file = f"{destination}.etag"
+        if etag and os.path.exists(etag_file):
+            with open(etag_file, "r", encoding="utf-8") as f:
+                if f.read() != etag:
+                    return False
+            verified = True
+
+        return verified
+    except Exception as e:
+        log(f"Could not check {url} for changes: {e}")
+        return False
+
+
 def download_file(url, destination):
-    """Download a file from a URL to a destination using urllib"""
+    """Download a file from a URL to a destination, reusing pooled connections"""
     try:
         # Create directory if it doesn't exist
         os.makedirs(os.path.dirname(os.path.abspath(destination)), exist_ok=True)
 
-        # Setup request with a user agent to avoid potential blocks
-        headers = {
-            "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/119.0.0.0 Safari/537.36"
-        }
-        req = urllib.request.Request(url, headers=headers)
-
-        # Download the file
-        with urllib.request.urlopen(req) as response, open(
-            destination, "wb"
-        ) as out_file:
-            shutil.copyfileobj(response, out_file)
+        pool_key, conn, response = http_request("GET", url)
+        try:
+            if response.status != 200:
+                response.read()
+                log(
+                    f"Error downloading {url}: HTTP {response.status} {response.reason}"
+                )
+                release_connection(pool_key, conn)
+                return False
+
+            # Download the file in large chunks to keep the number of syscalls low
+            with open(destination, "wb", buffering=DOWNLOAD_CHUNK_SIZE) as out_file:
+                shutil.copyfileobj(response, out_file, length=DOWNLOAD_CHUNK_SIZE)
+        except Exception:
+            response.close()
+            if conn is not None:
+                conn.close()
+            raise
+
+        release_connection(pool_key, conn)
+
+        # Remember the ETag so the next run can tell whether the file changed
+        etag = response.getheader("ETag")
+        etag_file = f"{destination}.etag"
+        if etag:
+            with open(etag_file, "w", encoding="utf-8") as f:
+                f.write(etag)
+        elif os.path.exists(etag_file):
+            os.unlink(etag_file)
 
         return True
-    except urllib.error.URLError as e:
-        log(f"Error downloading {url}: {e}")
-        return False
     except Exception as e:
         log(f"Error downloading {url}: {e}")
         return False
 
 
+def fetch_file(url, destination):
+    """Download a file unless an earlier run already fetched the same one
+
+    Returns (succeeded, cached), where cached is True if the existing file was kept.
+    """
+    if os.path.exists(destination) and is_download_current(url, destination):
+        return True, True
+    return download_file(url, destination), False
+
+
+def fast_copy(src, dst):
+    """Copy a file as a copy-on-write clone where the filesystem supports it
+
+    On btrfs the clone shares the existing blocks instead of copying them,
+    elsewhere this falls back to a regular copy.
+    """
+    if fcntl is not None:
+        try:
+            with open(src, "rb") as src_file, open(dst, "wb") as dst_file:
+                fcntl.ioctl(dst_file.fileno(), FICLONE, src_file.fileno())
+            return
+        except OSError:
+            pass
+
+    shutil.copy(src, dst)
+
+
+@functools.lru_cache(maxsize=1)
 def get_steam_users():
     """Get all Steam user IDs from userdata directory"""
     if not os.path.exists(USERDATA_DIR):
         log(f"Steam userdata directory not found: {USERDATA_DIR}")
         return []
 
+    # scandir gets the entry type from the directory listing, no stat per user
     users = []
-    for user_id in os.listdir(USERDATA_DIR):
-        if user_id != "anonymous" and os.path.isdir(
-            os.path.join(USERDATA_DIR, user_id)
-        ):
-            users.append(user_id)
+    with os.scandir(USERDATA_DIR) as entries:
+        for entry in entries:
+            if entry.name != "anonymous" and entry.is_dir():
+                users.append(entry.name)
 
     return users
 
 
+@functools.lru_cache(maxsize=1)
+def get_shortcuts_paths():
+    """Map each Steam user ID to the path of their shortcuts.vdf"""
+    return {
+        user_id: os.path.join(USERDATA_DIR, user_id, "config", "shortcuts.vdf")
+        for user_id in get_steam_users()
+    }
+
+
+def map_file(f):
+    """Map an open file read-only, or read it when mapping isn't safe
+
+    Empty files can't be mapped. While Steam is running it may truncate its
+    VDF files in place, and touching a truncated mapping kills the process
+    with SIGBUS, so the contents are read into memory instead.
+    """
+    if _STEAM_RUNNING or os.fstat(f.fileno()).st_size == 0:
+        return f.read()
+    return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+
+@contextlib.contextmanager
+def open_mapped(path):
+    """Open a file with map_file and unmap it again when the block exits"""
+    with open(path, "rb") as f:
+        content = map_file(f)
+    try:
+        yield content
+    finally:
+        if isinstance(content, mmap.mmap):
+            content.close()
+
+
+def atomic_backup(path):
+    """Back up a file to path.bak as a hardlink, so no data is copied"""
+    backup_file = f"{path}.bak"
+    try:
+        os.unlink(backup_file)
+    except FileNotFoundError:
+        pass
+
+    try:
+        os.link(path, backup_file)
+    except OSError:
+        # Filesystem without hardlink support, fall back to a real copy
+        shutil.copy2(path, backup_file)
+
+    return backup_file
+
+
+def atomic_write(path, data):
+    """Write data to a temporary file and rename it over path
+
+    The original inode is never modified, so a hardlinked backup keeps the
+    old contents and an interrupted write leaves the file untouched.
+    """
+    tmp_file = f"{path}.tmp"
+    try:
+        with open(tmp_file, "wb") as f:
+            f.write(data)
+        shutil.copymode(path, tmp_file)
+        os.replace(tmp_file, path)
+    except BaseException:
+        if os.path.exists(tmp_file):
+            os.unlink(tmp_file)
+        raise
+
+
 def generate_app_id(exe_path, app_name):
     """Generate a Steam app ID for a non-Steam game"""
     # This mimics how Steam generates app IDs for non-Steam games
     # The app ID is a CRC32 hash of the target and app name
     uniqueName = exe_path.encode("utf-8") + app_name.encode("utf-8")
-    app_id = hashlib.crc32(uniqueName) & 0xFFFFFFFF
-    return app_id
+    return zlib.crc32(uniqueName)
+
+
+# Steam app ID of the Edge shortcut, fixed by its exe path and name
+EDGE_APP_ID = generate_app_id(EDGE_EXE, EDGE_NAME)
+
+
+# Sizes of the fixed-width binary VDF types parse_vdf_binary has no use for:
+# float32, uint64 and int64
+_VDF_SKIPPED_SIZES = {0x03: 4, 0x07: 8, 0x0A: 8}
+
+
+def parse_vdf_binary(buf):
+    """Parse Valve's binary VDF format (used by shortcuts.vdf) into nested dicts"""
+    # Each field starts with a type byte followed by a NUL-terminated key:
+    # NUL = nested map, SOH = string, STX = 32-bit little-endian int,
+    # BS = end of the current map. Floats and 64-bit ints are skipped by size.
+    root = {}
+    stack = [root]
+    i = 0
+    end = len(buf)
+
+    with memoryview(buf) as view:
+        while i < end:
+            type_tag = buf[i]
+            if type_tag == 0x08:
+                if len(stack) == 1:
+                    break
+                stack.pop()
+                i += 1
+                continue
+
+            key_end = buf.find(b"\x00", i + 1)
+            if key_end == -1:
+                raise ValueError(f"Unterminated VDF key at offset {i}")
+            key = str(view[i + 1 : key_end], "utf-8", "replace")
+            i = key_end + 1
+
+            if type_tag == 0x00:
+                child = {}
+                stack[-1][key] = child
+                stack.append(child)
+            elif type_tag == 0x01:
+                value_end = buf.find(b"\x00", i)
+                if value_end == -1:
+                    raise ValueError(f"Unterminated VDF string at offset {i}")
+                stack[-1][key] = str(view[i:value_end], "utf-8", "replace")
+                i = value_end + 1
+            elif type_tag == 0x02:
+                if i + 4 > end:
+                    raise ValueError(f"Truncated VDF integer at offset {i}")
+                stack[-1][key] = int.from_bytes(view[i : i + 4], byteorder="little")
+                i += 4
+            elif type_tag in _VDF_SKIPPED_SIZES:
+                size = _VDF_SKIPPED_SIZES[type_tag]
+                if i + size > end:
+                    raise ValueError(f"Truncated VDF value at offset {i}")
+                i += size
+            else:
+                raise ValueError(f"Unknown VDF type 0x{type_tag:02x} at offset {i}")
 
+    return root
 
-def find_edge_app_id(shortcuts_vdf):
-    """Find Microsoft Edge's app ID in shortcuts.vdf"""
+
+def get_shortcut_entries(content):
+    """Return the entries of the shortcuts map in shortcuts.vdf, keyed by index"""
+    shortcuts = parse_vdf_binary(content).get("shortcuts", {})
+    return {
+        index: entry for index, entry in shortcuts.items() if isinstance(entry, dict)
+    }
+
+
+class ShortcutsFile:
+    """A user's shortcuts.vdf, read once and edited in memory until saved"""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            # Most files are only searched, so map them instead of reading
+            self._mapping = map_file(f)
+        self._buf = None
+        self.modified = False
+        self._entries = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        """Unmap the file, edits already copied into buf stay available"""
+        if isinstance(self._mapping, mmap.mmap):
+            self._mapping.close()
+        self._mapping = None
+
+    @property
+    def buf(self):
+        """Editable contents, copied out of the mapping on first use"""
+        if self._buf is None:
+            self._buf = bytearray(self._mapping)
+            self.close()
+        return self._buf
+
+    @property
+    def content(self):
+        """Current contents for reading, without copying them out of the mapping"""
+        return self._buf if self._buf is not None else self._mapping
+
+    @property
+    def entries(self):
+        """Shortcut entries keyed by index, parsed again after each change"""
+        if self._entries is None:
+            self._entries = get_shortcut_entries(self.content)
+        return self._entries
+
+    def mark_modified(self):
+        """Record that buf was edited so it gets reparsed and saved"""
+        self.modified = True
+        self._entries = None
+
+    def save(self):
+        """Back up shortcuts.vdf and write the edited contents in one go"""
+        atomic_backup(self.path)
+        atomic_write(self.path, self.buf)
+        self.modified = False
+
+
+def load_shortcuts_file(shortcuts_vdf):
+    """Read shortcuts.vdf into a ShortcutsFile, returns None if it can't be read"""
     try:
-        with open(shortcuts_vdf, "rb") as f:
-            content = f.read()
+        return ShortcutsFile(shortcuts_vdf)
+    except OSError as e:
+        log(f"Error reading {shortcuts_vdf}: {e}")
+        return None
 
-        # Look for "Microsoft Edge" in the binary data using Valve's format
-        # SOH + AppName + NUL + Microsoft Edge + NUL
-        app_name_pattern = re.compile(rb"\x01AppName\x00(Microsoft Edge|Edge)\x00")
-        # STX + appid + NUL + [4 bytes of appid]
-        app_id_pattern = re.compile(rb"\x02appid\x00(.{4})")
 
-        matches = list(app_name_pattern.finditer(content))
+def close_shortcuts_files(shortcuts_files, keep=None):
+    """Close the ShortcutsFile of each (user_id, shortcuts) pair except keep"""
+    for _, shortcuts in shortcuts_files:
+        if shortcuts is not keep:
+            shortcuts.close()
+
 
-        for match in matches:
-            # Find the appid before this match
-            # We need to look back to find the start of this entry
-            # Typically each entry starts with an index followed by appid
-            start_pos = max(0, match.start() - 200)
-            segment = content[start_pos : match.start()]
+def find_edge_app_id(shortcuts):
+    """Find Microsoft Edge's app ID in a ShortcutsFile"""
+    try:
+        # Index the entries by name so Edge can be looked up directly
+        entries = {}
+        for entry in shortcuts.entries.values():
+            entries.setdefault(entry.get("AppName"), entry)
 
-            app_id_match = app_id_pattern.search(segment)
-            if app_id_match:
-                app_id_bytes = app_id_match.group(1)
-                app_id = int.from_bytes(app_id_bytes, byteorder="little")
-                return app_id
+        for name in ("Microsoft Edge", "Edge"):
+            entry = entries.get(name)
+            if entry and "appid" in entry:
+                return entry["appid"]
 
         return None
     except Exception as e:
@@ -153,170 +640,107 @@ def find_edge_app_id(shortcuts_vdf):
         return None
 
 
-def modify_shortcuts_vdf(
-    shortcuts_vdf, edge_app_id, new_name="Xbox Cloud Gaming (Beta)"
-):
+def modify_shortcuts_vdf(shortcuts, edge_app_id, new_name="Xbox Cloud Gaming (Beta)"):
     """Modify shortcuts.vdf to update Edge's name and launch options"""
     try:
-        # Make a backup of the file
-        backup_file = f"{shortcuts_vdf}.bak"
-        shutil.copy2(shortcuts_vdf, backup_file)
-
-        with open(shortcuts_vdf, "rb") as f:
-            content = f.read()
+        content = shortcuts.buf
 
+        # Collect the edits as start offset -> (end offset, replacement)
+        splices = {}
         # According to Valve's documentation, we need to find the entry with this pattern:
         # SOH + AppName + NUL + Microsoft Edge + NUL
-        edge_pattern = re.compile(rb"\x01AppName\x00(Microsoft Edge|Edge)\x00")
-        matches = list(edge_pattern.finditer(content))
-
-        if matches:
-            for match in matches:
-                old_name = match.group(1)
-                # Replace the name
-                content = content.replace(
-                    b"\x01AppName\x00" + old_name + b"\x00",
-                    b"\x01AppName\x00" + new_name.encode("utf-8") + b"\x00",
-                )
-
-                # Find the LaunchOptions section for this entry and add our options
-                # We need to look backward to find the entry ID, then forward to find LaunchOptions
-                start_pos = max(0, match.start() - 200)
-                entry_segment = content[start_pos : match.start() + 500]
-
-                # Add launch options if section exists
-                launch_options_pattern = re.compile(
-                    rb"\x01LaunchOptions\x00([^\x00]*)\x00"
-                )
-                launch_match = launch_options_pattern.search(entry_segment)
-                if launch_match:
-                    current_options = launch_match.group(1)
-                    # Only add our options if they're not already there
-                    if b'--kiosk "https://www.xbox.com/play"' not in current_options:
-                        new_options = (
-                            current_options + b" " + LAUNCH_OPTIONS.encode("utf-8")
-                        )
-                        content = content.replace(
-                            b"\x01LaunchOptions\x00" + current_options + b"\x00",
-                            b"\x01LaunchOptions\x00" + new_options + b"\x00",
-                        )
-                        log(f"Updated launch options for {new_name}")
-
-        # Write the modified content back
-        with open(shortcuts_vdf, "wb") as f:
-            f.write(content)
+        for match in _APP_NAME_RE.finditer(content):
+            # Replace the name
+            splices[match.start(1)] = (match.end(1), new_name.encode("utf-8"))
+
+            # Find the LaunchOptions section for this entry and add our options
+            # It follows AppName, so searching backwards would hit the previous entry
+            launch_match = _LAUNCH_RE.search(content, match.end(), match.end() + 500)
+            if launch_match:
+                current_options = launch_match.group(1)
+                # Only add our options if they're not already there
+                if b'--kiosk "https://www.xbox.com/play"' not in current_options:
+                    # Append our options right after the existing ones
+                    splices[launch_match.end(1)] = (
+                        launch_match.end(1),
+                        b" " + LAUNCH_OPTIONS.encode("utf-8"),
+                    )
+                    log(f"Updated launch options for {new_name}")
+
+        # Apply the edits back to front so earlier offsets stay valid
+        for start in sorted(splices, reverse=True):
+            end, replacement = splices[start]
+            content[start:end] = replacement
+        shortcuts.mark_modified()
 
         log(f"Updated shortcuts.vdf - renamed Edge to '{new_name}'")
         return True
     except Exception as e:
         log(f"Error modifying shortcuts.vdf: {e}")
-        # Restore backup if something went wrong
-        if os.path.exists(backup_file):
-            shutil.copy2(backup_file, shortcuts_vdf)
         return False
 
 
-def add_shortcut_to_steam(shortcuts_vdf, user_id):
+def add_shortcut_to_steam(shortcuts, user_id):
     """Add Microsoft Edge as a shortcut to Steam by directly modifying shortcuts.vdf"""
     try:
         debug_mode = "--debug" in sys.argv
 
-        # Make a backup
-        backup_file = f"{shortcuts_vdf}.bak"
-        shutil.copy2(shortcuts_vdf, backup_file)
+        # Look for shortcuts section in the contents already in memory
+        shortcuts_pos = shortcuts.content.find(b"\x00shortcuts\x00")
 
         if debug_mode:
-            log(f"Created backup of shortcuts.vdf at {backup_file}")
-
             # In debug mode, dump the file contents
-            with open(shortcuts_vdf, "rb") as f:
-                content = f.read()
-            log(f"Original shortcuts.vdf size: {len(content)} bytes")
+            log(f"Original shortcuts.vdf size: {len(shortcuts.content)} bytes")
 
-            # Look for shortcuts section
-            if b"\x00shortcuts\x00" in content:
-                log("Found 'shortcuts' section in the file")
+            if shortcuts_pos != -1:
+                log(f"Found 'shortcuts' section in the file at offset {shortcuts_pos}")
             else:
                 log("WARNING: Could not find 'shortcuts' section in shortcuts.vdf")
 
         # Get Edge Flatpak information
-        flatpak_info = run_command(
-            ["flatpak", "info", "com.microsoft.Edge"], check=False, debug=debug_mode
-        )
+        flatpak_info = get_edge_flatpak_info(debug=debug_mode)
         if not flatpak_info or flatpak_info.returncode != 0:
             log("Could not get Flatpak info for Microsoft Edge")
             if debug_mode and flatpak_info:
                 log(f"Flatpak info error: {flatpak_info.stderr}")
             return False
 
-        # Get the Edge executable path
-        edge_exe = "/usr/bin/flatpak"
-        edge_launch_args = "run com.microsoft.Edge"
-        edge_name = "Microsoft Edge"
-
         if debug_mode:
-            log(f"Using exe path: {edge_exe}")
-            log(f"Using launch args: {edge_launch_args}")
+            log(f"Using exe path: {EDGE_EXE}")
+            log(f"Using launch args: {EDGE_LAUNCH_ARGS}")
 
-        # Generate a unique app ID
-        app_id = generate_app_id(edge_exe.encode(), edge_name.encode())
+        app_id = EDGE_APP_ID
         if debug_mode:
             log(f"Generated app ID: {app_id}")
 
-        # Read the existing shortcuts.vdf
-        with open(shortcuts_vdf, "rb") as f:
-            content = f.read()
-
-        # Determine the next available index
-        index_pattern = re.compile(rb"\x00(\d+)\x00")
-        indices = [int(m.group(1)) for m in index_pattern.finditer(content)]
-        next_index = "0" if not indices else str(max([int(i) for i in indices]) + 1)
+        # Determine the next available index from the existing entry keys
+        indices = (int(index) for index in shortcuts.entries if index.isdigit())
+        next_index = str(max(indices, default=-1) + 1)
 
         if debug_mode:
-            log(f"Found existing indices: {indices}")
+            log(f"Found existing indices: {list(shortcuts.entries)}")
             log(f"Using next index: {next_index}")
 
         # Build the new shortcut entry based on Valve's format
-        # Format follows the structure documented by Valve
-        new_entry = (
-            b"\x00"
-            + next_index.encode()
-            + b"\x00"
-            + b"\x02appid\x00"
-            + app_id.to_bytes(4, byteorder="little")
-            + b"\x00\x00\x00\x00"
-            + b"\x01AppName\x00"
-            + edge_name.encode()
-            + b"\x00"
-            + b'\x01Exe\x00"'
-            + edge_exe.encode()
-            + b'"\x00'
-            + b'\x01StartDir\x00"'
-            + os.path.dirname(edge_exe).encode()
-            + b'"\x00'
-            + b"\x01icon\x00\x00"
-            + b"\x01ShortcutPath\x00\x00"
-            + b"\x01LaunchOptions\x00"
-            + edge_launch_args.encode()
-            + b"\x00"
-            + b"\x02IsHidden\x00\x00\x00\x00\x00\x00"
-            + b"\x02AllowDesktopConfig\x00\x01\x00\x00\x00"
-            + b"\x02AllowOverlay\x00\x01\x00\x00\x00"
-            + b"\x02OpenVR\x00\x00\x00\x00\x00"
-            + b"\x02Devkit\x00\x00\x00\x00\x00"
-            + b"\x01DevkitGameID\x00\x00"
-            + b"\x01DevkitOverrideAppID\x00\x00"
-            + b"\x02LastPlayTime\x00\x00\x00\x00\x00"
-            + b"\x01FlatpakAppID\x00com.microsoft.Edge\x00"
-            + b"\x00tags\x00"
-            + b"\x08\x08"
+        # Only the index and appid vary, the remaining fields are precomputed
+        new_entry = b"".join(
+            [
+                b"\x00",
+                next_index.encode(),
+                b"\x00\x02appid\x00",
+                app_id.to_bytes(4, byteorder="little"),
+                _EDGE_SHORTCUT_FIELDS,
+            ]
         )
 
         if debug_mode:
             log(f"Created new entry with size: {len(new_entry)} bytes")
 
+        # Only copy the contents for editing once we're about to change them
+        content = shortcuts.buf
+
         # Check if shortcuts section exists
-        if b"\x00shortcuts\x00" in content:
+        if shortcuts_pos != -1:
             if debug_mode:
                 log("Found shortcuts section, looking for insertion point")
 
@@ -326,9 +750,10 @@ def add_shortcut_to_steam(shortcuts_vdf, user_id):
                     log("File ends with BS BS, replacing them")
 
                 # Remove the last two BS characters
-                content = content[:-2]
+                del content[-2:]
                 # Add our entry and the closing BS BS
-                content = content + new_entry + b"\x08\x08"
+                content += new_entry
+                content += b"\x08\x08"
             else:
                 # If not ending with BS BS, insert before the last BS (if it exists)
                 last_bs_pos = content.rfind(b"\x08")
@@ -337,26 +762,24 @@ def add_shortcut_to_steam(shortcuts_vdf, user_id):
                         log(
                             f"Found last BS at position {last_bs_pos}, inserting before it"
                         )
-                    content = content[:last_bs_pos] + new_entry + content[last_bs_pos:]
+                    content[last_bs_pos:last_bs_pos] = new_entry
                 else:
                     # Append to the end if we can't find a good insertion point
                     if debug_mode:
                         log(
                             "Could not find a good insertion point, appending to the end"
                         )
-                    content = content + new_entry
+                    content += new_entry
         else:
             # Create a new shortcuts section
             if debug_mode:
                 log("No shortcuts section found, creating a new one")
-            content = b"\x00shortcuts\x00" + new_entry + b"\x08\x08"
+            content[:] = b"\x00shortcuts\x00" + new_entry + b"\x08\x08"
 
-        # Write the modified content back
-        with open(shortcuts_vdf, "wb") as f:
-            f.write(content)
+        shortcuts.mark_modified()
 
         if debug_mode:
-            log(f"Wrote {len(content)} bytes to shortcuts.vdf")
+            log(f"New shortcuts.vdf size: {len(content)} bytes")
 
         log(f"Added Microsoft Edge to Steam with app ID: {app_id}")
         return True
@@ -369,47 +792,55 @@ def add_shortcut_to_steam(shortcuts_vdf, user_id):
 
             traceback.print_exc()
 
-        # Restore backup if something went wrong
-        if os.path.exists(backup_file):
-            shutil.copy2(backup_file, shortcuts_vdf)
-            log("Restored backup of shortcuts.vdf")
-
         return False
 
 
 def add_edge_to_steam():
     """
     Add Microsoft Edge to Steam
-    Returns the app ID if successful, None otherwise
+    Returns the app ID, user ID and that user's ShortcutsFile if successful,
+    None for each otherwise. Changes to the ShortcutsFile are not saved yet,
+    and the caller must close it.
     """
+    global _STEAM_RUNNING
+
     log("Checking if Edge is already in Steam...")
 
-    # Check existing shortcuts.vdf files
-    for user_id in get_steam_users():
-        shortcuts_vdf = os.path.join(USERDATA_DIR, user_id, "config", "shortcuts.vdf")
+    # Read each user's shortcuts.vdf once for both the check and the add
+    shortcuts_files = []
+    for user_id, shortcuts_vdf in get_shortcuts_paths().items():
         if os.path.exists(shortcuts_vdf):
-            edge_app_id = find_edge_app_id(shortcuts_vdf)
-            if edge_app_id:
-                log(f"Microsoft Edge is already in Steam with app ID: {edge_app_id}")
-                return edge_app_id, user_id
+            shortcuts = load_shortcuts_file(shortcuts_vdf)
+            if shortcuts:
+                shortcuts_files.append((user_id, shortcuts))
+
+    # Check existing shortcuts.vdf files
+    for user_id, shortcuts in shortcuts_files:
+        edge_app_id = find_edge_app_id(shortcuts)
+        if edge_app_id:
+            log(f"Microsoft Edge is already in Steam with app ID: {edge_app_id}")
+            close_shortcuts_files(shortcuts_files, keep=shortcuts)
+            return edge_app_id, user_id, shortcuts
 
     debug_mode = "--debug" in sys.argv
     log("Microsoft Edge not found in Steam. Attempting to add it automatically...")
 
     # Try to add Edge to Steam automatically
-    for user_id in get_steam_users():
-        shortcuts_vdf = os.path.join(USERDATA_DIR, user_id, "config", "shortcuts.vdf")
-        if os.path.exists(shortcuts_vdf):
-            if debug_mode:
-                log(f"Found shortcuts.vdf at {shortcuts_vdf}")
-                log(f"Attempting to add Edge for user {user_id}")
+    for user_id, shortcuts in shortcuts_files:
+        if debug_mode:
+            log(f"Found shortcuts.vdf at {shortcuts.path}")
+            log(f"Attempting to add Edge for user {user_id}")
+
+        if add_shortcut_to_steam(shortcuts, user_id):
+            # Check if Edge was added successfully
+            edge_app_id = find_edge_app_id(shortcuts)
+            if edge_app_id:
+                log(f"Successfully added Edge to Steam with app ID: {edge_app_id}")
+                close_shortcuts_files(shortcuts_files, keep=shortcuts)
+                return edge_app_id, user_id, shortcuts
 
-            if add_shortcut_to_steam(shortcuts_vdf, user_id):
-                # Check if Edge was added successfully
-                edge_app_id = find_edge_app_id(shortcuts_vdf)
-                if edge_app_id:
-                    log(f"Successfully added Edge to Steam with app ID: {edge_app_id}")
-                    return edge_app_id, user_id
+    # Don't hold the files open while the user changes them through Steam
+    close_shortcuts_files(shortcuts_files)
 
     # If automatic addition failed, ask user to do it manually
     log("Automatic addition failed. Please add Edge to Steam manually:")
@@ -419,22 +850,90 @@ def add_edge_to_steam():
         "3. In the 'Add a Game' window, check Microsoft Edge and click 'Add Selected Programs'"
     )
 
-    # Wait for user to add Edge to Steam
+    # Wait for user to add Edge to Steam, which leaves Steam running
     input("Press Enter after you've added Microsoft Edge to Steam...")
+    _STEAM_RUNNING = True
 
-    # Check again for Edge in Steam
-    for user_id in get_steam_users():
-        shortcuts_vdf = os.path.join(USERDATA_DIR, user_id, "config", "shortcuts.vdf")
+    # Check again for Edge in Steam, rereading the files Steam has just written
+    for user_id, shortcuts_vdf in get_shortcuts_paths().items():
         if os.path.exists(shortcuts_vdf):
-            edge_app_id = find_edge_app_id(shortcuts_vdf)
+            shortcuts = load_shortcuts_file(shortcuts_vdf)
+            if not shortcuts:
+                continue
+            edge_app_id = find_edge_app_id(shortcuts)
             if edge_app_id:
                 log(f"Found Microsoft Edge in Steam with app ID: {edge_app_id}")
-                return edge_app_id, user_id
+                return edge_app_id, user_id, shortcuts
+            shortcuts.close()
 
     log(
         "Could not find Microsoft Edge in Steam after manual addition. Continuing anyway..."
     )
-    return None, None
+    return None, None, None
+
+
+@functools.lru_cache(maxsize=8)
+def get_app_section_pattern(edge_app_id):
+    """Compile the pattern matching an app's section in localconfig.vdf"""
+    return re.compile(rf'"({edge_app_id}|Non-Steam-App_{edge_app_id})"\s*\{{'.encode())
+
+
+def add_launch_options_to_section(content, match):
+    """Return localconfig.vdf contents with our launch options in the app's section
+
+    Returns None if the section already has them, so nothing needs writing.
+    """
+    # Get the section start position
+    section_start = match.start()
+
+    # Find where the section ends (next closing brace at the same level),
+    # jumping between braces with str.find instead of visiting every character
+    brace_count = 1
+    section_end = section_start
+    next_open = content.find(b"{", match.end())
+    next_close = content.find(b"}", match.end())
+
+    while next_close != -1:
+        if next_open != -1 and next_open < next_close:
+            brace_count += 1
+            next_open = content.find(b"{", next_open + 1)
+        else:
+            brace_count -= 1
+            if brace_count == 0:
+                section_end = next_close + 1
+                break
+            next_close = content.find(b"}", next_close + 1)
+
+    # Extract the section
+    section = content[section_start:section_end].decode("utf-8", "ignore")
+
+    def add_launch_options(launch_match):
+        current_options = launch_match.group(1)
+        # Only add our options if they're not already there
+        if _LAUNCH_OPTIONS_TXT in current_options:
+            return launch_match.group(0)
+        return f'"LaunchOptions" "{current_options} {_LAUNCH_OPTIONS_TXT}"'
+
+    # Update existing LaunchOptions in this section in a single pass
+    updated_section, replaced = _LAUNCH_RE_TXT.subn(
+        add_launch_options, section, count=1
+    )
+    if not replaced:
+        # Add LaunchOptions if not present
+        updated_section = section.replace(
+            "{", '{\n\t\t"LaunchOptions"\t\t"' + _LAUNCH_OPTIONS_TXT + '"', 1
+        )
+    elif updated_section == section:
+        return None
+
+    # Replace the section in the content
+    return b"".join(
+        [
+            content[:section_start],
+            updated_section.encode("utf-8"),
+            content[section_end:],
+        ]
+    )
 
 
 def update_localconfig_vdf(user_id, edge_app_id, new_name="Xbox Cloud Gaming (Beta)"):
@@ -451,59 +950,23 @@ def update_localconfig_vdf(user_id, edge_app_id, new_name="Xbox Cloud Gaming (Be
             log(f"localconfig.vdf not found at {localconfig_path}")
             return False
 
-        # Make a backup
-        backup_file = f"{localconfig_path}.bak"
-        shutil.copy2(localconfig_path, backup_file)
-
-        with open(localconfig_path, "r", encoding="utf-8", errors="ignore") as f:
-            content = f.read()
-
-        # Find the section for our app ID
-        app_section_pattern = re.compile(
-            rf'"({edge_app_id}|Non-Steam-App_{edge_app_id})"\\s*{{'
-        )
-        match = app_section_pattern.search(content)
-
-        if match:
-            # Get the section start position
-            section_start = match.start()
-
-            # Find where the section ends (next closing brace at the same level)
-            brace_count = 1
-            section_end = section_start
-
-            for i in range(section_start + len(match.group(0)), len(content)):
-                if content[i] == "{":
-                    brace_count += 1
-                elif content[i] == "}":
-                    brace_count -= 1
-                    if brace_count == 0:
-                        section_end = i + 1
-                        break
-
-            # Extract the section
-            section = content[section_start:section_end]
-
-            # Update the LaunchOptions in this section
-            if '"LaunchOptions"' in section:
-                # Update existing LaunchOptions
-                updated_section = re.sub(
-                    r'"LaunchOptions"\s*"([^"]*)"',
-                    f'"LaunchOptions" "\\1 {LAUNCH_OPTIONS}"',
-                    section,
-                )
-            else:
-                # Add LaunchOptions if not present
-                updated_section = section.replace(
-                    "{", '{\n\t\t"LaunchOptions"\t\t"' + LAUNCH_OPTIONS + '"', 1
-                )
-
-            # Replace the section in the content
-            content = content[:section_start] + updated_section + content[section_end:]
-
-            # Write the updated content back
-            with open(localconfig_path, "w", encoding="utf-8") as f:
-                f.write(content)
+        # Map the file and search it in place, only the app's section is decoded.
+        # The mapping is closed before the file is replaced below.
+        updated_content = None
+        with open_mapped(localconfig_path) as content:
+            # Find the section for our app ID
+            match = get_app_section_pattern(edge_app_id).search(content)
+            if match:
+                updated_content = add_launch_options_to_section(content, match)
+
+        if match and updated_content is None:
+            # Leave the file and its existing backup alone on reruns
+            log("Launch options already set in localconfig.vdf, nothing to update")
+            return True
+        elif updated_content is not None:
+            # Make a backup and write the updated content back
+            atomic_backup(localconfig_path)
+            atomic_write(localconfig_path, updated_content)
 
             log(f"Updated launch options in localconfig.vdf")
             return True
@@ -524,9 +987,6 @@ def update_localconfig_vdf(user_id, edge_app_id, new_name="Xbox Cloud Gaming (Be
 
     except Exception as e:
         log(f"Error updating localconfig.vdf: {e}")
-        # Restore backup if something went wrong
-        if os.path.exists(backup_file):
-            shutil.copy2(backup_file, localconfig_path)
 
         # Fallback to manual update
         log("Please update the launch options manually:")
@@ -550,16 +1010,39 @@ def apply_artwork(edge_app_id, user_id):
 
     # Download artwork
     log("Downloading Xbox Cloud Gaming artwork...")
-    artwork_files = {}
+    downloads = []
     for art_type, url in ARTWORK.items():
         file_ext = os.path.splitext(url)[1]
         destination = os.path.join(
             ARTWORK_DIR, f"xbox_cloud_gaming_{art_type}{file_ext}"
         )
+        downloads.append((art_type, url, destination))
 
-        if download_file(url, destination):
+    # Download all images in parallel, each worker on its own connection
+    results = []
+    try:
+        with concurrent.futures.ThreadPoolExecutor(
+            max_workers=len(downloads)
+        ) as executor:
+            futures = {}
+            for art_type, url, destination in downloads:
+                future = executor.submit(fetch_file, url, destination)
+                futures[future] = (art_type, destination)
+            for future in concurrent.futures.as_completed(futures):
+                art_type, destination = futures[future]
+                results.append((art_type, destination, *future.result()))
+    finally:
+        # No more downloads this run, don't keep the connections open
+        close_connections()
+
+    artwork_files = {}
+    for art_type, destination, succeeded, cached in results:
+        if succeeded:
             artwork_files[art_type] = destination
-            log(f"Downloaded {art_type} artwork")
+            if cached:
+                log(f"Using cached {art_type} artwork")
+            else:
+                log(f"Downloaded {art_type} artwork")
         else:
             log(f"Failed to download {art_type} artwork")
 
@@ -577,22 +1060,23 @@ def apply_artwork(edge_app_id, user_id):
 
     # Apply each artwork
     for art_type, file_path in artwork_files.items():
-        if art_type not in artwork_mapping:
+        mapping = artwork_mapping.get(art_type)
+        if mapping is None:
             continue
 
-        suffix = artwork_mapping[art_type]["suffix"]
+        suffix = mapping["suffix"]
         file_ext = os.path.splitext(file_path)[1]
 
         # Apply to Steam
         dest_path = os.path.join(grid_dir, f"{edge_app_id}{suffix}{file_ext}")
-        shutil.copy(file_path, dest_path)
+        fast_copy(file_path, dest_path)
         log(f"Applied {art_type} artwork to {dest_path}")
 
         # For legacy naming (important for banners)
         if art_type == "grid":
             legacy_id = (int(edge_app_id) << 32) | 0x02000000
             legacy_path = os.path.join(grid_dir, f"{legacy_id}{suffix}{file_ext}")
-            shutil.copy(file_path, legacy_path)
+            fast_copy(file_path, legacy_path)
             log(f"Applied legacy {art_type} artwork to {legacy_path}")
 
     return True
@@ -600,6 +1084,8 @@ def apply_artwork(edge_app_id, user_id):
 
 def main():
     """Main installer function"""
+    global _STEAM_RUNNING
+
     # Parse command line arguments
     debug_mode = "--debug" in sys.argv
 
@@ -623,20 +1109,31 @@ def main():
     os.makedirs(ARTWORK_DIR, exist_ok=True)
 
     # Check for Steam running
-    steam_processes = run_command(["pgrep", "steam"], check=False, debug=debug_mode)
-    if steam_processes and steam_processes.returncode == 0:
+    steam_pids = find_steam_pids()
+    if steam_pids:
+        if debug_mode:
+            log(f"Found Steam processes: {steam_pids}")
         log("Steam is currently running. For best results, Steam should be closed.")
         answer = input("Would you like to close Steam now? (y/n): ")
         if answer.lower() == "y":
             log("Closing Steam...")
-            run_command(["killall", "steam"], check=False, debug=debug_mode)
+            for pid in steam_pids:
+                try:
+                    os.kill(pid, signal.SIGTERM)
+                except ProcessLookupError:
+                    pass
+                except OSError as e:
+                    log(f"Could not close Steam process {pid}: {e}")
             time.sleep(2)  # Give Steam time to close
+            # Check once more, Steam may still be shutting down
+            steam_pids = find_steam_pids()
+
+    # Decide once whether the VDF files can be mapped, see map_file
+    _STEAM_RUNNING = bool(steam_pids)
 
     # Step 1: Install Microsoft Edge
     log("Checking if Microsoft Edge is installed...")
-    edge_check = run_command(
-        ["flatpak", "list", "--app"], check=False, debug=debug_mode
-    )
+    edge_check = get_flatpak_apps(debug=debug_mode)
 
     if edge_check and "com.microsoft.Edge" in edge_check.stdout:
         log("Microsoft Edge is already installed")
@@ -679,16 +1176,20 @@ def main():
         return
 
     # Step 3: Add Edge to Steam and find its app ID
-    edge_app_id, user_id = add_edge_to_steam()
+    edge_app_id, user_id, shortcuts = add_edge_to_steam()
 
     # Step 4: Rename Edge to Xbox Cloud Gaming and update launch options
     if edge_app_id and user_id:
         log(f"Configuring Edge (app ID: {edge_app_id}) for Xbox Cloud Gaming...")
 
-        # Update shortcuts.vdf to rename Edge
-        shortcuts_vdf = os.path.join(USERDATA_DIR, user_id, "config", "shortcuts.vdf")
-        if os.path.exists(shortcuts_vdf):
-            modify_shortcuts_vdf(shortcuts_vdf, edge_app_id)
+        # Update shortcuts.vdf to rename Edge, then write all shortcut changes at once
+        with shortcuts:
+            modify_shortcuts_vdf(shortcuts, edge_app_id)
+            if shortcuts.modified:
+                try:
+                    shortcuts.save()
+                except Exception as e:
+                    log(f"Error saving shortcuts.vdf: {e}")
 
         # Also try to update localconfig.vdf for launch options
         update_localconfig_vdf(user_id, edge_app_id)